@@ -5,77 +5,535 @@ Bluesky CLI - Alpha's command-line interface for Bluesky.
 A simple CLI for posting, reading timeline, and interacting with Bluesky.
 """
 
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import json
 import os
 import sys
+import tempfile
+import time
 from datetime import datetime, timezone
-from pathlib import Path
+from typing import TYPE_CHECKING
 
 import click
-from atproto import Client
-from atproto.exceptions import AtProtocolError
+
+# atproto pulls in pydantic, httpx and its generated models, which costs far
+# more at startup than the rest of the CLI. Only its exceptions are imported
+# eagerly (atproto_core is lightweight); the clients are imported on first use
+# so --help and logout never load them.
+from atproto_core.exceptions import AtProtocolError
+
+if TYPE_CHECKING:
+    from atproto import AsyncClient, Client, Session, SessionEvent
 
 
+# Cache directory, honouring $XDG_CACHE_HOME. Paths are plain strings used
+# with os/os.path directly, so no Path objects are built at startup.
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "bsky"
+)
+
 # Session cache location
-SESSION_FILE = Path.home() / ".cache" / "bsky" / "session.txt"
+SESSION_FILE = os.path.join(CACHE_DIR, "session.txt")
+
+# Bluesky's post length limits: 300 graphemes (user-perceived characters),
+# and the lexicon's 3000 bytes of UTF-8
+MAX_POST_GRAPHEMES = 300
+MAX_POST_BYTES = 3000
+
+# URI -> CID cache location, and how long entries stay valid (seconds)
+URI_CACHE = os.path.join(CACHE_DIR, "uris.json")
+URI_CACHE_TTL = 3600
+
+# Largest page getTimeline will return. Requests up to this size are served in
+# a single round-trip; only larger --limit values paginate.
+TIMELINE_PAGE_SIZE = 100
+
+# A cached access token expiring sooner than this (seconds) goes through a full
+# login, which lets the SDK refresh it; matches the SDK's own refresh margin.
+SESSION_REFRESH_MARGIN = 15 * 60
+
+# Whether SESSION_FILE exists, learned from the first load/save/clear so we
+# never need a separate stat() for it.
+_session_file_exists: bool | None = None
+
+
+def session_file_exists() -> bool:
+    """Return whether a session file is on disk, stat()ing it at most once."""
+    global _session_file_exists
+    if _session_file_exists is None:
+        _session_file_exists = os.path.exists(SESSION_FILE)
+    return _session_file_exists
 
 
-def save_session(client: Client) -> None:
-    """Save the current session to disk using SDK's export."""
-    SESSION_FILE.parent.mkdir(parents=True, exist_ok=True)
-    session_string = client.export_session_string()
-    SESSION_FILE.write_text(session_string)
+def save_session(session_string: str) -> None:
+    """Save a session string to disk."""
+    global _session_file_exists
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(SESSION_FILE, "w") as f:
+        f.write(session_string)
+    _session_file_exists = True
+
+
+def on_session_change(event: SessionEvent, session: Session) -> None:
+    """Save the session whenever the SDK creates or refreshes one.
+
+    Registered on every client, so the file is written exactly when tokens
+    rotate (including refreshes partway through a command) and never for a
+    session that was merely imported from disk.
+    """
+    if event.name in ("CREATE", "REFRESH"):
+        save_session(session.export())
 
 
 def load_session() -> str | None:
     """Load a saved session string from disk."""
-    if not SESSION_FILE.exists():
+    global _session_file_exists
+    if _session_file_exists is False:
         return None
     try:
-        return SESSION_FILE.read_text().strip()
+        with open(SESSION_FILE) as f:
+            session_string = f.read().strip()
+    except FileNotFoundError:
+        _session_file_exists = False
+        return None
     except IOError:
         return None
+    _session_file_exists = True
+    return session_string
+
+
+def clear_session() -> bool:
+    """Clear the saved session, returning whether there was one."""
+    global _session_file_exists
+    try:
+        os.unlink(SESSION_FILE)
+        removed = True
+    except FileNotFoundError:
+        removed = False
+    _session_file_exists = False
+    return removed
+
+
+_uri_cache: dict[str, dict] | None = None
+_uri_cache_dirty = False
 
 
-def clear_session() -> None:
-    """Clear the saved session."""
-    if SESSION_FILE.exists():
-        SESSION_FILE.unlink()
+def _is_post_ref(ref) -> bool:
+    """Whether a value is a {uri, cid} strong reference with string fields."""
+    return isinstance(ref, dict) and isinstance(ref.get("uri"), str) and isinstance(ref.get("cid"), str)
+
+
+def _is_uri_cache_entry(entry) -> bool:
+    """Whether a value has the {uri, cid, root, ts} shape cache_post_ref writes."""
+    return (
+        _is_post_ref(entry)
+        and (entry.get("root") is None or _is_post_ref(entry["root"]))
+        and isinstance(entry.get("ts"), (int, float))
+    )
+
+
+def load_uri_cache() -> dict[str, dict]:
+    """Load the URI -> CID cache from disk, once per process.
+
+    A missing, unreadable or malformed cache file is treated as empty.
+    """
+    global _uri_cache
+    if _uri_cache is None:
+        try:
+            with open(URI_CACHE) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = None
+        if not (isinstance(cache, dict) and all(_is_uri_cache_entry(v) for v in cache.values())):
+            cache = {}
+        _uri_cache = cache
+    return _uri_cache
+
+
+def get_cached_post_ref(post_uri: str) -> dict | None:
+    """Return the cached {uri, cid, root, ts} entry for a post, if still fresh."""
+    entry = load_uri_cache().get(post_uri)
+    if entry and time.time() - entry["ts"] < URI_CACHE_TTL:
+        return entry
+    return None
+
+
+def cache_post_ref(post_uri: str, uri: str, cid: str, root: dict | None = None) -> dict:
+    """Remember a post's canonical URI, CID and, for replies, its thread root {uri, cid}."""
+    global _uri_cache_dirty
+    entry = {"uri": uri, "cid": cid, "root": root, "ts": time.time()}
+    load_uri_cache()[post_uri] = entry
+    _uri_cache_dirty = True
+    return entry
+
+
+def save_uri_cache() -> None:
+    """Write the URI -> CID cache back to disk if it changed, dropping stale entries.
+
+    Each write goes to its own temp file that is renamed into place, so
+    concurrent CLI processes never see or replace a half-written cache. The
+    cache is best-effort: if it can't be written, it is silently skipped.
+    """
+    global _uri_cache_dirty
+    if not _uri_cache_dirty:
+        return
+    now = time.time()
+    fresh = {k: v for k, v in load_uri_cache().items() if now - v["ts"] < URI_CACHE_TTL}
+    tmp = None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix="uris.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(fresh, f, separators=(",", ":"))
+        os.replace(tmp, URI_CACHE)
+    except OSError:
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+        return
+    _uri_cache_dirty = False
+
+
+def get_credentials() -> tuple[str, str]:
+    """Read the handle and app password from the environment, or exit."""
+    handle = os.environ.get("BLUESKY_HANDLE")
+    password = os.environ.get("BLUESKY_APP_PASSWORD")
+
+    if not handle or not password:
+        click.echo("Error: BLUESKY_HANDLE and BLUESKY_APP_PASSWORD must be set", err=True)
+        sys.exit(1)
+
+    return handle, password
+
+
+def http_options() -> dict:
+    """httpx options for the atproto clients' connection pool.
+
+    HTTP/2 lets concurrent requests (like with several URIs) multiplex over a
+    single connection instead of each opening its own TLS connection.
+    """
+    return {"http2": True}
+
+
+def session_is_fresh(session_string: str) -> bool:
+    """Whether a session's access token stays valid past the refresh margin.
+
+    Reads the exp claim from the JWT locally, without any network call.
+    """
+    from atproto import Session
+
+    try:
+        exp = Session.decode(session_string).access_jwt_payload.exp
+    except Exception:
+        return False
+    return exp is not None and exp > time.time() + SESSION_REFRESH_MARGIN
+
+
+def adopt_session(client: Client | AsyncClient, session: Session) -> None:
+    """Finish importing a session without login().
+
+    login() would fetch the profile into client.me, and the SDK reads the repo
+    for send_post, like, etc. from client.me.did, so fill in the DID and handle
+    from the session instead. Since the server hasn't seen the token yet, the
+    client is also guarded against it having been revoked.
+    """
+    from atproto import models
+
+    client.me = models.AppBskyActorDefs.ProfileViewDetailed(did=session.did, handle=session.handle)
+    if inspect.iscoroutinefunction(client._invoke):
+        _aguard_imported_session(client)
+    else:
+        _guard_imported_session(client)
+
+
+def session_rejected(e: AtProtocolError) -> bool:
+    """Whether an error means the server refused our access token."""
+    from atproto.exceptions import BadRequestError, UnauthorizedError
+
+    response = getattr(e, "response", None)
+    if isinstance(e, UnauthorizedError):
+        return response is not None and response.status_code == 401
+    if isinstance(e, BadRequestError):
+        return getattr(response and response.content, "error", None) in ("InvalidToken", "ExpiredToken")
+    return False
+
+
+def start_relogin() -> tuple[str, str]:
+    """Drop a cached session the server rejected and return the login credentials."""
+    clear_session()
+    click.echo("Cached session was rejected, logging in again", err=True)
+    return get_credentials()
+
+
+# _guard_imported_session and _aguard_imported_session below are the same
+# steps, differing only in the awaits and the lock; keep them in sync.
+
+
+def _guard_imported_session(client: Client) -> None:
+    """Recover on the first request if the server rejects an imported token.
+
+    A token revoked before it expired is only noticed when it is first used.
+    The client's request dispatch is wrapped so that such a rejection logs in
+    with the password and retries that same request, without rerunning the
+    command. The wrapper removes itself once the server accepts a request, so
+    later failures are reported as usual.
+    """
+    invoke = client._invoke
+
+    def guarded_invoke(*args, **kwargs):
+        try:
+            response = invoke(*args, **kwargs)
+        except AtProtocolError as e:
+            if not session_rejected(e):
+                raise
+            del client._invoke
+            handle, password = start_relogin()
+            try:
+                client.login(handle, password)
+            except AtProtocolError as e:
+                exit_login_failed(e)
+            report_login(client)
+            return invoke(*args, **kwargs)
+        client.__dict__.pop("_invoke", None)
+        return response
+
+    client._invoke = guarded_invoke
+
+
+def _aguard_imported_session(client: AsyncClient) -> None:
+    """Async counterpart of _guard_imported_session.
+
+    Concurrent requests may all be rejected; a lock makes only the first of
+    them log in again, and the rest just retry.
+    """
+    invoke = client._invoke
+    lock = asyncio.Lock()
+    relogged_in = False
+
+    async def guarded_invoke(*args, **kwargs):
+        nonlocal relogged_in
+        try:
+            response = await invoke(*args, **kwargs)
+        except AtProtocolError as e:
+            if not session_rejected(e):
+                raise
+            async with lock:
+                if not relogged_in:
+                    client.__dict__.pop("_invoke", None)
+                    handle, password = start_relogin()
+                    try:
+                        await client.login(handle, password)
+                    except AtProtocolError as e:
+                        exit_login_failed(e)
+                    report_login(client)
+                    relogged_in = True
+            return await invoke(*args, **kwargs)
+        client.__dict__.pop("_invoke", None)
+        return response
+
+    client._invoke = guarded_invoke
+
+
+def exit_failed(action: str, e: AtProtocolError) -> None:
+    """Report a failed command and exit."""
+    click.echo(f"Failed to {action}: {e}", err=True)
+    sys.exit(1)
+
+
+def reset_clients() -> None:
+    """Forget the process-wide clients, so the next command logs in again."""
+    global _async_client
+    _get_client_cached.cache_clear()
+    _async_client = None
+
+
+def get_session(client: Client | AsyncClient) -> Session:
+    """Return the client's session (handle, DID, tokens) without a network call."""
+    from atproto import Session
+
+    return Session.decode(client.export_session_string())
 
 
 def get_client() -> Client:
+    """Return the process-wide authenticated Bluesky client.
+
+    The client is created on first use and reused afterwards, so repeated calls
+    within one process share its session and HTTP connection pool.
+    """
+    return _get_client_cached()
+
+
+def new_client(is_async: bool = False) -> Client | AsyncClient:
+    """Build an unauthenticated client whose session changes are saved to disk."""
+    if is_async:
+        from atproto import AsyncClient as client_cls, AsyncRequest as request_cls
+    else:
+        from atproto import Client as client_cls, Request as request_cls
+
+    client = client_cls(request=request_cls(**http_options()))
+    client.on_session_change(on_session_change)
+    return client
+
+
+def exit_login_failed(e: AtProtocolError) -> None:
+    """Report a failed password login and exit."""
+    click.echo(f"Login failed: {e}", err=True)
+    sys.exit(1)
+
+
+def report_login(client: Client | AsyncClient) -> None:
+    """Tell the user a fresh password login succeeded."""
+    click.echo(f"✓ Logged in as @{get_session(client).handle} (session cached)", err=True)
+
+
+# _get_client_cached and _aget_client below are the same steps, differing
+# only in the awaits; keep them in sync.
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client_cached() -> Client:
     """Create and authenticate a Bluesky client, using cached session if available."""
     # Try to restore from cached session first
     session_string = load_session()
     if session_string:
+        client = new_client()
         try:
-            client = Client()
-            client.login(session_string=session_string)
-            # Update the saved session in case tokens were refreshed
-            save_session(client)
+            if session_is_fresh(session_string):
+                # Token still valid: import it without login()'s profile
+                # fetch. The SDK refreshes it on a later call if needed.
+                adopt_session(client, client._import_session_string(session_string))
+            else:
+                client.login(session_string=session_string)
             return client
         except Exception:
             # Session expired or invalid, clear it and fall through to fresh login
             clear_session()
 
     # Fresh login required
-    handle = os.environ.get("BLUESKY_HANDLE")
-    password = os.environ.get("BLUESKY_APP_PASSWORD")
+    handle, password = get_credentials()
+    client = new_client()
+    try:
+        client.login(handle, password)
+    except AtProtocolError as e:
+        exit_login_failed(e)
+    report_login(client)
+    return client
 
-    if not handle or not password:
-        click.echo("Error: BLUESKY_HANDLE and BLUESKY_APP_PASSWORD must be set", err=True)
-        sys.exit(1)
 
+# Async client for commands that overlap network round-trips. It is bound to
+# the event loop it was created in, i.e. the single asyncio.run() per command.
+_async_client: AsyncClient | None = None
+
+
+async def _aget_client() -> AsyncClient:
+    """Return the authenticated async Bluesky client, creating it on first use."""
+    global _async_client
+    if _async_client is None:
+        _async_client = await _acreate_client()
+    return _async_client
+
+
+async def _acreate_client() -> AsyncClient:
+    """Async counterpart of _get_client_cached."""
+    # Try to restore from cached session first
+    session_string = load_session()
+    if session_string:
+        client = new_client(is_async=True)
+        try:
+            if session_is_fresh(session_string):
+                # Token still valid: import it without login()'s profile
+                # fetch. The SDK refreshes it on a later call if needed.
+                adopt_session(client, await client._import_session_string(session_string))
+            else:
+                await client.login(session_string=session_string)
+            return client
+        except Exception:
+            # Session expired or invalid, clear it and fall through to fresh login
+            clear_session()
+
+    # Fresh login required
+    handle, password = get_credentials()
+    client = new_client(is_async=True)
     try:
-        client = Client()
-        client.login(handle, password)
-        # Save session for future use
-        save_session(client)
-        click.echo(f"✓ Logged in as @{client.me.handle} (session cached)", err=True)
+        await client.login(handle, password)
     except AtProtocolError as e:
-        click.echo(f"Login failed: {e}", err=True)
+        exit_login_failed(e)
+    report_login(client)
+    return client
+
+
+def parse_post_uri(post_uri: str) -> tuple[str, str]:
+    """Split an at://<repo>/app.bsky.feed.post/<rkey> URI into (repo, rkey)."""
+    parts = post_uri.split("/")
+    if len(parts) != 5 or parts[0] != "at:" or parts[3] != "app.bsky.feed.post":
+        click.echo(f"Error: Not a post URI: {post_uri}", err=True)
         sys.exit(1)
+    return parts[2], parts[4]
+
+
+async def get_post_record(client: AsyncClient, post_uri: str):
+    """Fetch just a post's record and CID, without the surrounding thread."""
+    repo, rkey = parse_post_uri(post_uri)
+    return await client.com.atproto.repo.get_record(
+        params={"repo": repo, "collection": "app.bsky.feed.post", "rkey": rkey}
+    )
+
+
+async def resolve_post_ref(client: AsyncClient, post_uri: str) -> dict:
+    """Return a post's {uri, cid, root} from the URI cache, or fetch and cache it."""
+    entry = get_cached_post_ref(post_uri)
+    if entry:
+        return entry
+
+    record = await get_post_record(client, post_uri)
+    root = None
+    if record.value.reply:
+        root = {"uri": record.value.reply.root.uri, "cid": record.value.reply.root.cid}
+    return cache_post_ref(post_uri, record.uri, record.cid, root)
 
-    return client
+
+def grapheme_length(text: str) -> int:
+    """Count the graphemes in text, the unit Bluesky's 300-character limit uses."""
+    if text.isascii():
+        # Only CRLF joins two ASCII characters; skip loading regex for these
+        return len(text) - text.count("\r\n")
+
+    import regex
+
+    return len(regex.findall(r"\X", text))
+
+
+def check_post_length(text: str, kind: str) -> None:
+    """Exit with an error if text is over either of Bluesky's post limits."""
+    length = grapheme_length(text)
+    if length > MAX_POST_GRAPHEMES:
+        click.echo(f"Error: {kind} too long ({length} graphemes, max {MAX_POST_GRAPHEMES})", err=True)
+        sys.exit(1)
+    size = len(text.encode())
+    if size > MAX_POST_BYTES:
+        click.echo(f"Error: {kind} too long ({size} bytes, max {MAX_POST_BYTES})", err=True)
+        sys.exit(1)
+
+
+def write_stdout(text: str) -> None:
+    """Write text to stdout in one call, bypassing click.echo where it isn't needed.
+
+    On Windows click.echo is kept for its console and ANSI handling; elsewhere
+    the encoded text goes straight to the binary buffer.
+    """
+    buffer = getattr(sys.stdout, "buffer", None)
+    if sys.platform == "win32" or buffer is None:
+        click.echo(text, nl=False)
+        return
+    sys.stdout.flush()
+    buffer.write(text.encode(sys.stdout.encoding or "utf-8", "replace"))
+    buffer.flush()
 
 
 def format_post(post, show_uri: bool = False) -> str:
@@ -85,7 +543,10 @@ def format_post(post, show_uri: bool = False) -> str:
 
     # Handle the timestamp
     created = record.created_at
-    if isinstance(created, str):
+    if isinstance(created, str) and len(created) >= 16 and created[10] == "T":
+        # Fast path: YYYY-MM-DDTHH:MM..., so the display form is just two slices
+        time_str = f"{created[:10]} {created[11:16]}"
+    elif isinstance(created, str):
         # Parse ISO format string
         try:
             dt = datetime.fromisoformat(created.replace("Z", "+00:00"))
@@ -95,22 +556,21 @@ def format_post(post, show_uri: bool = False) -> str:
     else:
         time_str = str(created)
 
-    lines = []
-    lines.append(f"@{author.handle} ({author.display_name or author.handle})")
-    lines.append(f"  {record.text}")
-    lines.append(f"  {time_str}")
-
     # Engagement stats
     like_count = post.post.like_count or 0
     repost_count = post.post.repost_count or 0
     reply_count = post.post.reply_count or 0
-    stats = f"  ♥ {like_count}  🔁 {repost_count}  💬 {reply_count}"
-    lines.append(stats)
 
+    # Build the whole block in one f-string rather than via a list and join
+    text = (
+        f"@{author.handle} ({author.display_name or author.handle})\n"
+        f"  {record.text}\n"
+        f"  {time_str}\n"
+        f"  ♥ {like_count}  🔁 {repost_count}  💬 {reply_count}"
+    )
     if show_uri:
-        lines.append(f"  URI: {post.post.uri}")
-
-    return "\n".join(lines)
+        text += f"\n  URI: {post.post.uri}"
+    return text
 
 
 @click.group()
@@ -127,9 +587,7 @@ def post(text: str):
 
     TEXT is the content of your post (max 300 characters).
     """
-    if len(text) > 300:
-        click.echo(f"Error: Post too long ({len(text)} chars, max 300)", err=True)
-        sys.exit(1)
+    check_post_length(text, "Post")
 
     client = get_client()
     try:
@@ -137,25 +595,98 @@ def post(text: str):
         click.echo(f"✓ Posted: {text[:50]}{'...' if len(text) > 50 else ''}")
         click.echo(f"  URI: {result.uri}")
     except AtProtocolError as e:
-        click.echo(f"Failed to post: {e}", err=True)
-        sys.exit(1)
+        exit_failed("post", e)
+
+
+def parse_since(ctx, param, value: str) -> datetime:
+    """Turn an age like 30m, 24h or 7d into the UTC time that long ago."""
+    units = {"m": 60, "h": 3600, "d": 86400}
+    try:
+        seconds = int(value[:-1]) * units[value[-1]]
+    except (ValueError, KeyError, IndexError):
+        raise click.BadParameter(f"expected an age like 30m, 24h or 7d, got {value!r}")
+    return datetime.fromtimestamp(time.time() - seconds, timezone.utc)
+
+
+def feed_item_time(item) -> datetime:
+    """When a feed item landed on the timeline (the repost time for reposts)."""
+    indexed_at = getattr(item.reason, "indexed_at", None) or item.post.indexed_at
+    return datetime.fromisoformat(indexed_at)
+
+
+def iter_timeline_pages(client: Client, limit: int, since: datetime):
+    """Yield pages of timeline items, up to ``limit`` items newer than ``since``.
+
+    Pages are fetched lazily, so callers can print each page as it arrives and
+    no further pages are requested once the posts get older than ``since``.
+    """
+    cursor = None
+    while limit > 0:
+        page = client.get_timeline(limit=min(limit, TIMELINE_PAGE_SIZE), cursor=cursor)
+        items = [item for item in page.feed if feed_item_time(item) >= since]
+        if items:
+            yield items
+        limit -= len(page.feed)
+        cursor = page.cursor
+        if not cursor or not page.feed or len(items) < len(page.feed):
+            return
 
 
 @cli.command()
-@click.option("-n", "--limit", default=20, help="Number of posts to show")
+@click.option(
+    "-n",
+    "--limit",
+    default=20,
+    help="Number of posts to show. Up to 100 are fetched in one request; "
+    "larger values take one request per 100 posts.",
+)
 @click.option("--uri", is_flag=True, help="Show post URIs (for replying)")
-def timeline(limit: int, uri: bool):
+@click.option(
+    "--since",
+    default="24h",
+    callback=parse_since,
+    help="Only show posts newer than this age, e.g. 30m, 24h, 7d",
+)
+@click.option(
+    "--output",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="Output format; json prints the raw feed items as a JSON array for scripting",
+)
+def timeline(limit: int, uri: bool, since: datetime, output: str):
     """Show your home timeline."""
     client = get_client()
     try:
-        feed = client.get_timeline(limit=limit)
-        click.echo(f"# Timeline ({len(feed.feed)} posts)\n")
-        for item in feed.feed:
-            click.echo(format_post(item, show_uri=uri))
-            click.echo()
+        if output == "text":
+            click.echo("# Timeline\n")
+
+        # The opening bracket goes out with the first page, so a failed first
+        # fetch leaves no partial JSON on stdout
+        separator = "["
+        for items in iter_timeline_pages(client, limit, since):
+            # One write per page rather than several per post
+            if output == "json":
+                # Serialized by pydantic directly, without format_post or dicts
+                chunk = ",".join(
+                    item.model_dump_json(by_alias=True, exclude_none=True) for item in items
+                )
+                write_stdout(separator + chunk)
+                separator = ","
+            else:
+                write_stdout("".join(format_post(item, show_uri=uri) + "\n\n" for item in items))
+
+            if uri:
+                # Pre-populate the URI cache so a following like/reply skips a lookup
+                for item in items:
+                    reply_ref = item.post.record.reply
+                    root = {"uri": reply_ref.root.uri, "cid": reply_ref.root.cid} if reply_ref else None
+                    cache_post_ref(item.post.uri, item.post.uri, item.post.cid, root)
+
+        if output == "json":
+            write_stdout("[]\n" if separator == "[" else "]\n")
+        save_uri_cache()
     except AtProtocolError as e:
-        click.echo(f"Failed to get timeline: {e}", err=True)
-        sys.exit(1)
+        exit_failed("get timeline", e)
 
 
 @cli.command()
@@ -167,47 +698,72 @@ def reply(post_uri: str, text: str):
     POST_URI is the at:// URI of the post to reply to.
     TEXT is your reply (max 300 characters).
     """
-    if len(text) > 300:
-        click.echo(f"Error: Reply too long ({len(text)} chars, max 300)", err=True)
-        sys.exit(1)
+    check_post_length(text, "Reply")
 
-    client = get_client()
+    asyncio.run(_reply(post_uri, text))
+
+
+async def _reply(post_uri: str, text: str) -> None:
+    client = await _aget_client()
     try:
-        # Get the parent post to get its CID
-        thread = client.get_post_thread(uri=post_uri)
-        parent = thread.thread.post
+        # Get the parent's CID (and its thread root, if any)
+        parent = await resolve_post_ref(client, post_uri)
+        parent_ref = {"uri": parent["uri"], "cid": parent["cid"]}
+        root_ref = parent["root"] or parent_ref
 
         # Create reply reference
-        reply_ref = {
-            "root": {"uri": parent.uri, "cid": parent.cid},
-            "parent": {"uri": parent.uri, "cid": parent.cid},
-        }
+        reply_ref = {"root": root_ref, "parent": parent_ref}
 
-        result = client.send_post(text=text, reply_to=reply_ref)
+        result = await client.send_post(text=text, reply_to=reply_ref)
+        save_uri_cache()
         click.echo(f"✓ Replied: {text[:50]}{'...' if len(text) > 50 else ''}")
         click.echo(f"  URI: {result.uri}")
     except AtProtocolError as e:
-        click.echo(f"Failed to reply: {e}", err=True)
-        sys.exit(1)
+        exit_failed("reply", e)
 
 
 @cli.command()
-@click.argument("post_uri")
-def like(post_uri: str):
-    """Like a post.
+@click.argument("post_uris", metavar="POST_URI...", nargs=-1, required=True)
+def like(post_uris: tuple[str, ...]):
+    """Like one or more posts.
 
-    POST_URI is the at:// URI of the post to like.
+    POST_URI is the at:// URI of a post to like. Several posts are liked
+    concurrently.
     """
-    client = get_client()
-    try:
-        # Get the post to get its CID
-        thread = client.get_post_thread(uri=post_uri)
-        post = thread.thread.post
-
-        client.like(uri=post.uri, cid=post.cid)
-        click.echo(f"✓ Liked post by @{post.author.handle}")
-    except AtProtocolError as e:
-        click.echo(f"Failed to like: {e}", err=True)
+    asyncio.run(_like_many(post_uris))
+
+
+async def _like_one(client: AsyncClient, post_uri: str) -> None:
+    ref = await resolve_post_ref(client, post_uri)
+    await client.like(uri=ref["uri"], cid=ref["cid"])
+
+
+async def _like_many(post_uris: tuple[str, ...]) -> None:
+    # Reject malformed URIs before any network work
+    repos = [parse_post_uri(post_uri)[0] for post_uri in post_uris]
+
+    client = await _aget_client()
+    # Each post is resolved and liked independently and concurrently, so one
+    # failure doesn't hide the likes that went through
+    results = await asyncio.gather(
+        *[_like_one(client, post_uri) for post_uri in post_uris], return_exceptions=True
+    )
+    save_uri_cache()
+
+    failed = False
+    for post_uri, repo, result in zip(post_uris, repos, results):
+        if isinstance(result, AtProtocolError):
+            click.echo(f"Failed to like {post_uri}: {result}", err=True)
+            failed = True
+        elif isinstance(result, BaseException):
+            raise result
+        # getRecord carries no author profile: name the author only when
+        # the URI itself uses a handle rather than a DID
+        elif repo.startswith("did:"):
+            click.echo(f"✓ Liked {post_uri}")
+        else:
+            click.echo(f"✓ Liked post by @{repo}")
+    if failed:
         sys.exit(1)
 
 
@@ -222,34 +778,37 @@ def thread(post_uri: str):
     try:
         result = client.get_post_thread(uri=post_uri)
         thread_post = result.thread
+        # Collect the output and write it once at the end
+        parts: list[str] = []
 
         # Show parent posts if any
         if hasattr(thread_post, "parent") and thread_post.parent:
-            click.echo("--- Parent ---")
+            parts.append("--- Parent ---")
             parent = thread_post.parent
             if hasattr(parent, "post"):
-                click.echo(f"@{parent.post.author.handle}: {parent.post.record.text}")
-            click.echo()
+                parts.append(f"@{parent.post.author.handle}: {parent.post.record.text}")
+            parts.append("")
 
         # Show main post
-        click.echo("--- Post ---")
+        parts.append("--- Post ---")
         post = thread_post.post
-        click.echo(f"@{post.author.handle} ({post.author.display_name or post.author.handle})")
-        click.echo(f"  {post.record.text}")
-        click.echo(f"  ♥ {post.like_count or 0}  🔁 {post.repost_count or 0}  💬 {post.reply_count or 0}")
-        click.echo()
+        parts.append(f"@{post.author.handle} ({post.author.display_name or post.author.handle})")
+        parts.append(f"  {post.record.text}")
+        parts.append(f"  ♥ {post.like_count or 0}  🔁 {post.repost_count or 0}  💬 {post.reply_count or 0}")
+        parts.append("")
 
         # Show replies if any
         if hasattr(thread_post, "replies") and thread_post.replies:
-            click.echo("--- Replies ---")
+            parts.append("--- Replies ---")
             for reply in thread_post.replies[:10]:
                 if hasattr(reply, "post"):
-                    click.echo(f"@{reply.post.author.handle}: {reply.post.record.text[:100]}")
-                    click.echo()
+                    parts.append(f"@{reply.post.author.handle}: {reply.post.record.text[:100]}")
+                    parts.append("")
+
+        click.echo("\n".join(parts))
 
     except AtProtocolError as e:
-        click.echo(f"Failed to get thread: {e}", err=True)
-        sys.exit(1)
+        exit_failed("get thread", e)
 
 
 @cli.command()
@@ -265,14 +824,14 @@ def search(query: str, limit: int):
         results = client.app.bsky.feed.search_posts(
             params={"q": query, "limit": limit}
         )
-        click.echo(f"# Search: '{query}' ({len(results.posts)} results)\n")
+        parts = [f"# Search: '{query}' ({len(results.posts)} results)", ""]
         for post in results.posts:
-            click.echo(f"@{post.author.handle}: {post.record.text[:100]}...")
-            click.echo(f"  ♥ {post.like_count or 0}  URI: {post.uri}")
-            click.echo()
+            parts.append(f"@{post.author.handle}: {post.record.text[:100]}...")
+            parts.append(f"  ♥ {post.like_count or 0}  URI: {post.uri}")
+            parts.append("")
+        click.echo("\n".join(parts))
     except AtProtocolError as e:
-        click.echo(f"Failed to search: {e}", err=True)
-        sys.exit(1)
+        exit_failed("search", e)
 
 
 @cli.command()
@@ -286,40 +845,45 @@ def profile(handle: str | None):
     try:
         if handle is None:
             # Show own profile
-            handle = client.me.handle
+            handle = get_session(client).did
 
         result = client.get_profile(handle)
 
-        click.echo(f"# @{result.handle}")
+        parts = [f"# @{result.handle}"]
         if result.display_name:
-            click.echo(f"  {result.display_name}")
+            parts.append(f"  {result.display_name}")
         if result.description:
-            click.echo(f"  {result.description}")
-        click.echo()
-        click.echo(f"  Followers: {result.followers_count}")
-        click.echo(f"  Following: {result.follows_count}")
-        click.echo(f"  Posts: {result.posts_count}")
+            parts.append(f"  {result.description}")
+        parts.append("")
+        parts.append(f"  Followers: {result.followers_count}")
+        parts.append(f"  Following: {result.follows_count}")
+        parts.append(f"  Posts: {result.posts_count}")
+        click.echo("\n".join(parts))
 
     except AtProtocolError as e:
-        click.echo(f"Failed to get profile: {e}", err=True)
-        sys.exit(1)
+        exit_failed("get profile", e)
 
 
 @cli.command()
 def whoami():
     """Show your authenticated account info."""
     client = get_client()
-    click.echo(f"Logged in as: @{client.me.handle}")
-    click.echo(f"DID: {client.me.did}")
-    if SESSION_FILE.exists():
+    try:
+        # Ask the server, so a revoked cached session isn't reported as valid
+        session = client.com.atproto.server.get_session()
+    except AtProtocolError as e:
+        exit_failed("get session", e)
+    click.echo(f"Logged in as: @{session.handle}")
+    click.echo(f"DID: {session.did}")
+    if session_file_exists():
         click.echo(f"Session cached at: {SESSION_FILE}")
 
 
 @cli.command()
 def logout():
     """Clear cached session (forces fresh login on next command)."""
-    if SESSION_FILE.exists():
-        clear_session()
+    if clear_session():
+        reset_clients()
         click.echo("✓ Session cleared")
     else:
         click.echo("No cached session found")
@@ -0,0 +1,441 @@
+"""Tests for the bsky CLI, run against a stubbed PDS over httpx.MockTransport."""
+
+import base64
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from click.testing import CliRunner
+
+from bluesky_cli import cli
+
+DID = "did:plc:alpha"
+HANDLE = "alpha.test"
+POST_URI = f"at://{DID}/app.bsky.feed.post/3kabc"
+
+
+def make_jwt(exp: int, label: str = "access") -> str:
+    """Build an unsigned JWT carrying just the claims the CLI and SDK read."""
+    def b64(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+    header = b64({"alg": "ES256K", "typ": "JWT"})
+    payload = b64({"exp": exp, "iat": 0, "sub": DID, "scope": "com.atproto.access", "jti": label})
+    return f"{header}.{payload}.sig"
+
+
+def make_session(access_ttl: int = 7200) -> str:
+    now = int(time.time())
+    return ":::".join(
+        [HANDLE, DID, make_jwt(now + access_ttl), make_jwt(now + 86400 * 30, "refresh"), "https://pds.test"]
+    )
+
+
+class FakePDS:
+    """Answers the XRPC calls the CLI makes and records them."""
+
+    def __init__(self, revoked: tuple[str, ...] = ()):
+        self.calls: list[tuple[str, dict]] = []
+        self.revoked = set(revoked)
+        self.fail_subjects: set[str] = set()
+        self.fresh_access = make_jwt(int(time.time()) + 7200, "fresh")
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        method = request.url.path.rsplit("/", 1)[-1]
+        body = json.loads(request.content) if request.content else dict(request.url.params)
+        self.calls.append((method, body))
+
+        # createSession is unauthenticated; the SDK still sends the old token
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if token in self.revoked and method != "com.atproto.server.createSession":
+            return httpx.Response(401, json={"error": "InvalidToken", "message": "Token has been revoked"})
+
+        if method == "com.atproto.server.createSession":
+            return httpx.Response(
+                200,
+                json={
+                    "accessJwt": self.fresh_access,
+                    "refreshJwt": make_jwt(int(time.time()) + 86400 * 30, "refresh2"),
+                    "did": DID,
+                    "handle": HANDLE,
+                },
+            )
+        if method == "com.atproto.server.getSession":
+            return httpx.Response(200, json={"did": DID, "handle": HANDLE})
+        if method == "app.bsky.feed.getTimeline":
+            return httpx.Response(200, json={"feed": []})
+        if method == "app.bsky.actor.getProfile":
+            return httpx.Response(200, json={"did": DID, "handle": HANDLE})
+        if method == "com.atproto.repo.getRecord":
+            return httpx.Response(
+                200,
+                json={
+                    "uri": f"at://{body['repo']}/app.bsky.feed.post/{body['rkey']}",
+                    "cid": "bafyparent",
+                    "value": {
+                        "$type": "app.bsky.feed.post",
+                        "text": "parent",
+                        "createdAt": "2024-01-01T00:00:00Z",
+                    },
+                },
+            )
+        if method == "com.atproto.repo.createRecord":
+            subject = body["record"].get("subject", {}).get("uri")
+            if subject in self.fail_subjects:
+                return httpx.Response(400, json={"error": "InvalidRequest", "message": "no"})
+            return httpx.Response(200, json={"uri": f"at://{DID}/{body['collection']}/3knew", "cid": "bafynew"})
+        return httpx.Response(404, json={"error": "MethodNotImplemented"})
+
+    def methods(self) -> list[str]:
+        return [method for method, _ in self.calls]
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(cli, "SESSION_FILE", str(tmp_path / "session.txt"))
+    monkeypatch.setattr(cli, "URI_CACHE", str(tmp_path / "uris.json"))
+    monkeypatch.setattr(cli, "_session_file_exists", None)
+    monkeypatch.setattr(cli, "_uri_cache", None)
+    monkeypatch.setattr(cli, "_uri_cache_dirty", False)
+    monkeypatch.delenv("BLUESKY_HANDLE", raising=False)
+    monkeypatch.delenv("BLUESKY_APP_PASSWORD", raising=False)
+    cli.reset_clients()
+    yield
+    cli.reset_clients()
+
+
+@pytest.fixture
+def pds(monkeypatch):
+    server = FakePDS()
+    options = cli.http_options()
+    monkeypatch.setattr(cli, "http_options", lambda: {**options, "transport": httpx.MockTransport(server)})
+    return server
+
+
+def test_http_options_enable_http2():
+    # httpx raises ImportError here if the http2 extra (h2) isn't installed
+    with httpx.Client(**cli.http_options()) as client:
+        assert client._transport._pool._http2
+
+
+def test_post_with_fresh_cached_session(pds):
+    cli.save_session(make_session())
+
+    result = CliRunner().invoke(cli.cli, ["post", "hello"])
+
+    assert result.exit_code == 0, result.output
+    assert "✓ Posted: hello" in result.output
+    # No login round-trip, and the record goes to the session's repo
+    assert pds.methods() == ["com.atproto.repo.createRecord"]
+    assert pds.calls[0][1]["repo"] == DID
+
+
+def test_like_with_fresh_cached_session(pds):
+    cli.save_session(make_session())
+
+    result = CliRunner().invoke(cli.cli, ["like", POST_URI])
+
+    assert result.exit_code == 0, result.output
+    assert f"✓ Liked {POST_URI}" in result.output
+    assert pds.methods() == ["com.atproto.repo.getRecord", "com.atproto.repo.createRecord"]
+    like_call = pds.calls[1][1]
+    assert like_call["repo"] == DID
+    subject = like_call["record"]["subject"]
+    assert (subject["uri"], subject["cid"]) == (POST_URI, "bafyparent")
+
+
+@pytest.fixture
+def revoked_session(pds, monkeypatch):
+    """A fresh-looking cached session whose access token the server has revoked."""
+    session = make_session()
+    cli.save_session(session)
+    pds.revoked.add(session.split(":::")[2])
+    monkeypatch.setenv("BLUESKY_HANDLE", HANDLE)
+    monkeypatch.setenv("BLUESKY_APP_PASSWORD", "app-password")
+    return session
+
+
+def test_revoked_cached_session_falls_back_to_password_login(pds, revoked_session):
+    result = CliRunner().invoke(cli.cli, ["post", "hello"])
+
+    assert result.exit_code == 0, result.output
+    assert result.stdout.count("✓ Posted: hello") == 1
+    assert "Cached session was rejected" in result.output
+    # Only the rejected call is retried, after a fresh login
+    assert pds.methods() == [
+        "com.atproto.repo.createRecord",
+        "com.atproto.server.createSession",
+        "app.bsky.actor.getProfile",
+        "com.atproto.repo.createRecord",
+    ]
+    with open(cli.SESSION_FILE) as f:
+        assert pds.fresh_access in f.read()
+
+
+def test_revoked_cached_session_does_not_repeat_output(pds, revoked_session):
+    result = CliRunner().invoke(cli.cli, ["timeline"])
+
+    assert result.exit_code == 0, result.output
+    assert result.stdout == "# Timeline\n\n"
+
+
+def test_revoked_cached_session_recovers_concurrent_likes(pds, revoked_session):
+    uris = [f"at://{DID}/app.bsky.feed.post/{rkey}" for rkey in ("a", "b")]
+
+    result = CliRunner().invoke(cli.cli, ["like", *uris])
+
+    assert result.exit_code == 0, result.output
+    assert pds.methods().count("com.atproto.server.createSession") == 1
+    assert all(f"✓ Liked {uri}" in result.stdout for uri in uris)
+
+
+def test_token_rejected_after_confirmation_is_not_retried(pds):
+    session = make_session()
+    cli.save_session(session)
+    client = cli.get_client()
+    client.get_timeline(limit=1)
+
+    pds.revoked.add(session.split(":::")[2])
+    with pytest.raises(cli.AtProtocolError):
+        client.get_timeline(limit=1)
+
+    assert "com.atproto.server.createSession" not in pds.methods()
+
+
+def test_whoami_confirms_cached_session(pds):
+    cli.save_session(make_session())
+
+    result = CliRunner().invoke(cli.cli, ["whoami"])
+
+    assert result.exit_code == 0, result.output
+    assert f"Logged in as: @{HANDLE}" in result.output
+    assert pds.methods() == ["com.atproto.server.getSession"]
+
+
+def test_whoami_with_revoked_session_logs_in_again(pds, revoked_session):
+    result = CliRunner().invoke(cli.cli, ["whoami"])
+
+    assert result.exit_code == 0, result.output
+    assert result.stdout.count(f"Logged in as: @{HANDLE}") == 1
+    assert pds.methods()[-1] == "com.atproto.server.getSession"
+
+
+class FakeTimelineClient:
+    """Serves canned getTimeline pages and records the requests."""
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.calls: list[tuple[int, str | None]] = []
+
+    def get_timeline(self, limit, cursor):
+        self.calls.append((limit, cursor))
+        if len(self.calls) > 5:
+            raise AssertionError("pager did not stop")
+        feed, next_cursor = self.pages.pop(0) if self.pages else ([], None)
+        return SimpleNamespace(feed=feed, cursor=next_cursor)
+
+
+def feed_item(age_minutes: int):
+    indexed_at = datetime.now(timezone.utc) - timedelta(minutes=age_minutes)
+    return SimpleNamespace(reason=None, post=SimpleNamespace(indexed_at=indexed_at.isoformat()))
+
+
+def test_timeline_pager_stops_on_empty_page_with_cursor():
+    client = FakeTimelineClient([([], "c1"), ([], "c2")])
+    since = datetime.now(timezone.utc) - timedelta(days=1)
+
+    assert list(cli.iter_timeline_pages(client, 20, since)) == []
+    assert client.calls == [(20, None)]
+
+
+def test_timeline_pager_stops_at_since_cutoff():
+    client = FakeTimelineClient([([feed_item(10), feed_item(20)], "c1"), ([feed_item(30)], "c2")])
+    since = datetime.now(timezone.utc) - timedelta(minutes=15)
+
+    pages = list(cli.iter_timeline_pages(client, 150, since))
+
+    assert [len(page) for page in pages] == [1]
+    assert client.calls == [(100, None)]
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("hello", 5),
+        ("a\r\nb", 3),
+        ("e\u0301", 1),  # e + combining acute
+        ("\u2764\ufe0f", 1),  # heart + variation selector
+        ("\U0001f44d\U0001f3fd", 1),  # thumbs up + skin tone
+        ("\U0001f468\u200d\U0001f469\u200d\U0001f467", 1),  # ZWJ family
+        ("\U0001f1fa\U0001f1f8\U0001f1eb\U0001f1f7", 2),  # two flags
+        ("\U0001f3f4\U000e0067\U000e0062\U000e0073\U000e0063\U000e0074\U000e007f", 1),  # tag flag
+        ("\u1100\u1161", 1),  # decomposed Hangul GA (L V)
+        ("\u1100\u1161\u11a8", 1),  # decomposed Hangul GAG (L V T)
+        ("\uac00\u11a8", 1),  # precomposed GA (LV) + T
+        ("\u1100\u1161\u1100\u1161", 2),  # two decomposed syllables
+        ("\u0928\u092e\u0938\u094d\u0924\u0947", 3),  # Devanagari namaste: na, ma, ste
+        ("\u0915\u094d\u0937", 1),  # Devanagari conjunct ksha
+    ],
+)
+def test_grapheme_length(text, expected):
+    assert cli.grapheme_length(text) == expected
+
+
+def test_post_length_counts_graphemes():
+    # 300 flags are 600 code points but 300 graphemes
+    flags = "\U0001f1fa\U0001f1f8" * 300
+    assert cli.grapheme_length(flags) == 300
+
+    result = CliRunner().invoke(cli.cli, ["post", "\u1100\u1161" * 301])
+
+    assert result.exit_code == 1
+    assert "Error: Post too long (301 graphemes, max 300)" in result.output
+
+
+def test_reply_length_counts_utf8_bytes():
+    # 300 ZWJ family emoji are within the grapheme limit but 5400 bytes
+    family = "\U0001f468\u200d\U0001f469\u200d\U0001f467" * 300
+
+    result = CliRunner().invoke(cli.cli, ["reply", POST_URI, family])
+
+    assert result.exit_code == 1
+    assert "Error: Reply too long (5400 bytes, max 3000)" in result.output
+
+
+def timeline_item(age_minutes: int, rkey: str) -> dict:
+    indexed_at = (datetime.now(timezone.utc) - timedelta(minutes=age_minutes)).isoformat()
+    return {
+        "post": {
+            "uri": f"at://{DID}/app.bsky.feed.post/{rkey}",
+            "cid": f"bafy{rkey}",
+            "author": {"did": DID, "handle": HANDLE},
+            "record": {"$type": "app.bsky.feed.post", "text": rkey, "createdAt": indexed_at},
+            "indexedAt": indexed_at,
+        }
+    }
+
+
+@pytest.fixture
+def timeline_client(monkeypatch):
+    from atproto_client import models
+    from atproto_client.models.utils import get_or_create
+
+    pages = []
+
+    def get_timeline(limit, cursor):
+        if not pages:
+            raise cli.AtProtocolError("timeline unavailable")
+        return get_or_create(pages.pop(0), models.AppBskyFeedGetTimeline.Response)
+
+    monkeypatch.setattr(cli, "get_client", lambda: SimpleNamespace(get_timeline=get_timeline))
+    return pages
+
+
+def test_timeline_json_output(timeline_client):
+    timeline_client.append({"feed": [timeline_item(1, "a"), timeline_item(2, "b")]})
+
+    result = CliRunner().invoke(cli.cli, ["timeline", "--output", "json"])
+
+    assert result.exit_code == 0, result.output
+    feed = json.loads(result.output)
+    assert [item["post"]["record"]["text"] for item in feed] == ["a", "b"]
+    assert feed[0]["post"]["indexedAt"]
+    # JSON output alone does not touch the URI cache
+    assert not os.path.exists(cli.URI_CACHE)
+
+
+def test_timeline_json_failure_leaves_no_partial_output(timeline_client):
+    result = CliRunner().invoke(cli.cli, ["timeline", "--output", "json"])
+
+    assert result.exit_code == 1
+    assert "[" not in result.stdout
+    assert "Failed to get timeline" in result.output
+
+
+def test_timeline_uri_fills_cache(timeline_client):
+    timeline_client.append({"feed": [timeline_item(1, "a")]})
+
+    result = CliRunner().invoke(cli.cli, ["timeline", "--uri"])
+
+    assert result.exit_code == 0, result.output
+    with open(cli.URI_CACHE) as f:
+        assert json.load(f)[f"at://{DID}/app.bsky.feed.post/a"]["cid"] == "bafya"
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "not json",
+        "[]",
+        '"text"',
+        '{"at://x": 1}',
+        '{"at://x": {"cid": "bafy"}}',
+        '{"at://x": {"uri": "at://x", "cid": "bafy", "root": null, "ts": "soon"}}',
+        '{"at://x": {"uri": "at://x", "cid": "bafy", "root": [1], "ts": 1}}',
+    ],
+)
+def test_malformed_uri_cache_is_ignored(content):
+    with open(cli.URI_CACHE, "w") as f:
+        f.write(content)
+
+    assert cli.load_uri_cache() == {}
+    assert cli.get_cached_post_ref("at://x") is None
+
+
+def test_uri_cache_round_trip():
+    cli.cache_post_ref(POST_URI, POST_URI, "bafy", {"uri": "at://root", "cid": "bafyroot"})
+    cli.save_uri_cache()
+    cli._uri_cache = None
+
+    entry = cli.get_cached_post_ref(POST_URI)
+
+    assert (entry["cid"], entry["root"]["cid"]) == ("bafy", "bafyroot")
+
+
+def test_uri_cache_save_is_best_effort(tmp_path, monkeypatch):
+    blocked = tmp_path / "blocked"
+    blocked.write_text("not a directory")
+    monkeypatch.setattr(cli, "CACHE_DIR", str(blocked))
+    monkeypatch.setattr(cli, "URI_CACHE", str(blocked / "uris.json"))
+
+    cli.cache_post_ref(POST_URI, POST_URI, "bafy")
+    cli.save_uri_cache()  # must not raise
+
+    assert cli.get_cached_post_ref(POST_URI)["cid"] == "bafy"
+
+
+def test_uri_cache_save_leaves_no_temp_files(tmp_path):
+    cli.cache_post_ref(POST_URI, POST_URI, "bafy")
+    cli.save_uri_cache()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["uris.json"]
+
+
+def test_reply_uses_and_fills_uri_cache(pds):
+    cli.save_session(make_session())
+
+    result = CliRunner().invoke(cli.cli, ["reply", POST_URI, "hi"])
+
+    assert result.exit_code == 0, result.output
+    assert pds.methods() == ["com.atproto.repo.getRecord", "com.atproto.repo.createRecord"]
+    assert cli.get_cached_post_ref(POST_URI)["cid"] == "bafyparent"
+
+
+def test_like_reports_each_post_when_one_fails(pds):
+    cli.save_session(make_session())
+    uris = [f"at://{DID}/app.bsky.feed.post/{rkey}" for rkey in ("a", "b", "c")]
+    pds.fail_subjects.add(uris[1])
+
+    result = CliRunner().invoke(cli.cli, ["like", *uris])
+
+    assert result.exit_code == 1
+    assert f"✓ Liked {uris[0]}" in result.output
+    assert f"Failed to like {uris[1]}" in result.output
+    assert f"✓ Liked {uris[2]}" in result.output
+    assert pds.methods().count("com.atproto.repo.createRecord") == 3